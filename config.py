@@ -3,19 +3,37 @@
 """
 
 import os
+import functools
 from dotenv import load_dotenv
 
-# Загружаем переменные окружения
-load_dotenv()
+
+@functools.cache
+def _load_env():
+    """Загружает переменные окружения из .env (не чаще одного раза)"""
+    load_dotenv(override=False)
 
 
 class Config:
     """Конфигурация приложения"""
     
+    # Загружаем переменные окружения
+    _load_env()
+
+    # Результат успешной проверки validate()
+    _validated = False
+
     # Токены из переменных окружения
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
     YANDEX_API_KEY = os.getenv('YANDEX_API_KEY')
     YANDEX_FOLDER_ID = os.getenv('YANDEX_FOLDER_ID')
+
+    # Webhook: если WEBHOOK_URL не задан, бот работает через polling
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+    # Строка из окружения, в число приводится в validate()
+    WEBHOOK_PORT = os.getenv('WEBHOOK_PORT', '8443')
+
+    # Уровень логирования (в продакшене имеет смысл WARNING)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
     
     # Если переменные окружения не найдены, пытаемся загрузить из локального файла
     if not all([TELEGRAM_BOT_TOKEN, YANDEX_API_KEY, YANDEX_FOLDER_ID]):
@@ -34,10 +52,22 @@ class Config:
     @classmethod
     def validate(cls):
         """Проверяет, что все необходимые переменные настроены"""
+        if cls._validated:
+            return True
+
         required_vars = ['TELEGRAM_BOT_TOKEN', 'YANDEX_API_KEY', 'YANDEX_FOLDER_ID']
         missing_vars = [var for var in required_vars if not getattr(cls, var)]
         
         if missing_vars:
             raise ValueError(f"Отсутствуют обязательные переменные: {', '.join(missing_vars)}")
+
+        try:
+            port = int(cls.WEBHOOK_PORT)
+        except (TypeError, ValueError):
+            port = 0
+        if not 0 < port < 65536:
+            raise ValueError(f"Некорректный WEBHOOK_PORT: {cls.WEBHOOK_PORT!r} (ожидается число от 1 до 65535)")
+        cls.WEBHOOK_PORT = port
         
+        cls._validated = True
         return True
\ No newline at end of file
@@ -6,12 +6,15 @@
 import sys
 import logging
 from config import Config
-from telegram_bot import SettingsTelegramBot
-from models import AgentResponse, ResponseType
+
+# Неизвестное значение LOG_LEVEL не должно ронять запуск: используем INFO
+_log_level = logging.getLevelName(Config.LOG_LEVEL)
+if not isinstance(_log_level, int):
+    _log_level = logging.INFO
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+    level=_log_level
 )
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,9 @@ def main():
         Config.validate()
         print("✅ Конфигурация проверена")
 
+        # Тяжелые зависимости (telegram, httpx, requests) грузим только после проверки конфигурации
+        from telegram_bot import SettingsTelegramBot
+
         bot = SettingsTelegramBot()
         print("🤖 Бот инициализирован")
         print("📱 Запуск телеграм бота...")
@@ -31,6 +37,8 @@ def main():
         bot.run()
 
     except ValueError as e:
+        from models import AgentResponse
+
         error_response = AgentResponse.create_error(
             message="❌ Ошибка конфигурации",
             error_details=str(e),
@@ -56,6 +64,8 @@ def main():
         sys.exit(0)
 
     except Exception as e:
+        from models import AgentResponse
+
         error_response = AgentResponse.create_error(
             message="❌ Ошибка запуска бота",
             error_details=str(e)[:200],
@@ -3,92 +3,95 @@
 Все ответы возвращаются в фиксированном JSON формате
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from enum import Enum
+import orjson
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pydantic import BeforeValidator, Field, TypeAdapter
+from types import MappingProxyType
+from typing import Annotated, Final, List, Literal, Mapping, Optional, Dict, Any, Tuple
 from datetime import datetime
+import time
 
 
-class ResponseType(str, Enum):
+# Последняя секунда и ее ISO представление: [unix_seconds, iso_string]
+_ts_cache = [0, ""]
+
+
+def _now_iso() -> str:
+    """Возвращает текущее время в ISO формате с точностью до секунды"""
+    t = int(time.time())
+    c = _ts_cache
+    if c[0] != t:
+        c[0] = t
+        c[1] = datetime.fromtimestamp(t).isoformat()
+    return c[1]
+
+
+class ResponseType:
     """Типы ответов от агента"""
-    SUCCESS = "success"
-    ERROR = "error"
-    INFO = "info"
-    WARNING = "warning"
+    SUCCESS: Final = "success"
+    ERROR: Final = "error"
+    INFO: Final = "info"
+    WARNING: Final = "warning"
+
+
+# Пустые значения по умолчанию для data/actions/suggestions
+_EMPTY_DATA: Mapping[str, Any] = MappingProxyType({})
+
+# YandexGPT может вернуть null вместо пустого списка или объекта
+_DataField = Annotated[Mapping[str, Any], BeforeValidator(lambda v: _EMPTY_DATA if v is None else v)]
+_StrTupleField = Annotated[Tuple[str, ...], BeforeValidator(lambda v: () if v is None else v)]
+
 
+# Эмодзи для разных типов ответов
+_TYPE_EMOJIS = {
+    "success": "✅",
+    "error": "❌",
+    "info": "ℹ️",
+    "warning": "⚠️"
+}
 
-class AgentResponse(BaseModel):
+
+@dataclass(frozen=True, slots=True)
+class AgentResponse:
     """
     ЕДИНСТВЕННАЯ структура ответа для всех случаев
     Все ответы (успех, ошибки) возвращаются в этом формате
+
+    Валидация выполняется только для ответов YandexGPT через AGENT_RESPONSE_ADAPTER,
+    ответы, собранные в коде через create_*, не валидируются
+
+    Экземпляры неизменяемы и хешируемы, что позволяет кешировать их рендеринг
     """
-    type: ResponseType = Field(description="Тип ответа")
-    message: str = Field(description="Основное сообщение")
-    data: Optional[Dict[str, Any]] = Field(default=None, description="Дополнительные данные")
-    actions: Optional[List[str]] = Field(default=None, description="Рекомендуемые действия")
-    confidence: Optional[float] = Field(default=None, ge=0.0, le=1.0, description="Уверенность в ответе (0-1)")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat(), description="Время создания ответа")
-    suggestions: Optional[List[str]] = Field(default=None, description="Предложения по решению")
-    error_details: Optional[str] = Field(default=None, description="Детали ошибки (только для типа ERROR)")
+    type: Literal["success", "error", "info", "warning"]  # Тип ответа (см. ResponseType)
+    message: str  # Основное сообщение
+    data: _DataField = field(default_factory=lambda: _EMPTY_DATA, hash=False)  # Дополнительные данные
+    actions: _StrTupleField = ()  # Рекомендуемые действия
+    confidence: Annotated[Optional[float], Field(ge=0.0, le=1.0)] = None  # Уверенность в ответе (0-1)
+    timestamp: str = field(default_factory=_now_iso)  # Время создания ответа
+    suggestions: _StrTupleField = ()  # Предложения по решению
+    error_details: Optional[str] = None  # Детали ошибки (только для типа ERROR)
+
+    def __post_init__(self):
+        # None и списки из create_* приводим к неизменяемым значениям,
+        # чтобы ответ был хешируемым, а рендеринг обходился без проверок на None
+        if self.data is None:
+            object.__setattr__(self, "data", _EMPTY_DATA)
+        elif self.data is not _EMPTY_DATA:
+            # Копируем, чтобы изменения исходного dict не меняли ответ и кеши рендеринга
+            object.__setattr__(self, "data", MappingProxyType(dict(self.data)))
+        if not isinstance(self.actions, tuple):
+            object.__setattr__(self, "actions", tuple(self.actions or ()))
+        if not isinstance(self.suggestions, tuple):
+            object.__setattr__(self, "suggestions", tuple(self.suggestions or ()))
 
     def to_json(self) -> str:
-        """Возвращает JSON строку"""
-        return self.model_dump_json(indent=2)
+        """Возвращает JSON строку (результат кешируется)"""
+        return _dump_json(self)
 
     def to_formatted_text(self) -> str:
         """Возвращает отформатированный текст для пользователя"""
-        # Эмодзи для разных типов ответов
-        type_emojis = {
-            ResponseType.SUCCESS: "✅",
-            ResponseType.ERROR: "❌",
-            ResponseType.INFO: "ℹ️",
-            ResponseType.WARNING: "⚠️"
-        }
-
-        emoji = type_emojis.get(self.type, "ℹ️")
-        result = f"{emoji} {self.message}\n"
-
-        # Добавляем данные, если есть
-        if self.data:
-            if "category" in self.data:
-                result += f"\n🏷️ Категория: {self.data['category']}\n"
-
-            if "steps" in self.data and self.data["steps"]:
-                result += "\n📋 Пошаговое решение:\n"
-                for i, step in enumerate(self.data["steps"], 1):
-                    result += f"{i}. {step}\n"
-
-            if "solution" in self.data:
-                result += f"\n💡 Решение: {self.data['solution']}\n"
-
-            if "additional_info" in self.data:
-                result += f"\n📝 Дополнительно: {self.data['additional_info']}\n"
-
-        # Добавляем рекомендуемые действия
-        if self.actions:
-            result += "\n🎯 Рекомендуемые действия:\n"
-            for action in self.actions:
-                result += f"• {action}\n"
-
-        # Добавляем предложения (если есть)
-        if self.suggestions:
-            result += "\n💡 Предложения:\n"
-            for suggestion in self.suggestions:
-                result += f"• {suggestion}\n"
-
-        # Добавляем детали ошибки (только для ошибок)
-        if self.type == ResponseType.ERROR and self.error_details:
-            result += f"\n🔍 Детали ошибки: {self.error_details}\n"
-
-        # Добавляем уверенность
-        if self.confidence is not None:
-            confidence_emoji = "🟢" if self.confidence > 0.8 else "🟡" if self.confidence > 0.5 else "🔴"
-            result += f"\n{confidence_emoji} Уверенность: {self.confidence:.0%}\n"
-
-        # Добавляем время (timestamp)
-        result += f"\n🕐 Время: {self.timestamp}\n"
-
-        return result
+        return _render(self)
 
     @classmethod
     def create_success(cls, message: str, data: Optional[Dict[str, Any]] = None, 
@@ -116,14 +119,14 @@ class AgentResponse(BaseModel):
 
     @classmethod
     def create_info(cls, message: str, data: Optional[Dict[str, Any]] = None,
-                   actions: Optional[List[str]] = None) -> "AgentResponse":
+                   actions: Optional[List[str]] = None, confidence: float = 0.8) -> "AgentResponse":
         """Создает информационный ответ"""
         return cls(
             type=ResponseType.INFO,
             message=message,
             data=data,
             actions=actions,
-            confidence=0.8
+            confidence=confidence
         )
 
     @classmethod
@@ -136,4 +139,65 @@ class AgentResponse(BaseModel):
             data=data,
             actions=actions,
             confidence=0.7
-        )
\ No newline at end of file
+        )
+
+
+@lru_cache(maxsize=256)
+def _dump_json(resp: AgentResponse) -> str:
+    """Сериализует ответ в JSON"""
+    # orjson не умеет сериализовать MappingProxyType, поэтому отдаем его как dict
+    return orjson.dumps(resp, default=dict, option=orjson.OPT_INDENT_2).decode()
+
+
+@lru_cache(maxsize=256)
+def _render(resp: AgentResponse) -> str:
+    """Форматирует ответ для пользователя (результат кешируется)"""
+    emoji = _TYPE_EMOJIS.get(resp.type, "ℹ️")
+    result = f"{emoji} {resp.message}\n"
+
+    # Добавляем данные (пустой data просто не даст совпадений)
+    data = resp.data
+    if "category" in data:
+        result += f"\n🏷️ Категория: {data['category']}\n"
+
+    steps = data.get("steps")
+    if steps:
+        result += "\n📋 Пошаговое решение:\n"
+        for i, step in enumerate(steps, 1):
+            result += f"{i}. {step}\n"
+
+    if "solution" in data:
+        result += f"\n💡 Решение: {data['solution']}\n"
+
+    if "additional_info" in data:
+        result += f"\n📝 Дополнительно: {data['additional_info']}\n"
+
+    # Добавляем рекомендуемые действия
+    if resp.actions:
+        result += "\n🎯 Рекомендуемые действия:\n"
+        for action in resp.actions:
+            result += f"• {action}\n"
+
+    # Добавляем предложения (если есть)
+    if resp.suggestions:
+        result += "\n💡 Предложения:\n"
+        for suggestion in resp.suggestions:
+            result += f"• {suggestion}\n"
+
+    # Добавляем детали ошибки (только для ошибок)
+    if resp.type == ResponseType.ERROR and resp.error_details:
+        result += f"\n🔍 Детали ошибки: {resp.error_details}\n"
+
+    # Добавляем уверенность
+    if resp.confidence is not None:
+        confidence_emoji = "🟢" if resp.confidence > 0.8 else "🟡" if resp.confidence > 0.5 else "🔴"
+        result += f"\n{confidence_emoji} Уверенность: {resp.confidence:.0%}\n"
+
+    # Добавляем время (timestamp)
+    result += f"\n🕐 Время: {resp.timestamp}\n"
+
+    return result
+
+
+# Валидатор для ответов, полученных от YandexGPT (схема строится один раз при импорте)
+AGENT_RESPONSE_ADAPTER = TypeAdapter(AgentResponse)
\ No newline at end of file
@@ -2,31 +2,56 @@
 Telegram бот для Settings AI Agent
 """
 
+import asyncio
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
 from config import Config
-from yandex_gpt import YandexGPTClient
 from models import AgentResponse, ResponseType
 
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
+# Ответ, когда YandexGPT клиент не удалось инициализировать
+_CLIENT_UNAVAILABLE = AgentResponse.create_error(
+    message="❌ YandexGPT клиент недоступен",
+    error_details="Клиент не был инициализирован",
+    suggestions=["Проверьте настройки API", "Перезапустите бота"]
+)
+
 
 class SettingsTelegramBot:
     """Telegram бот для помощи с настройкой систем"""
 
     def __init__(self):
+        # Импорт вне try: сломанная зависимость должна остановить запуск, а не отключить клиент
+        from yandex_gpt import YandexGPTClient
+
         try:
             self.gpt_client = YandexGPTClient()
             logger.info("YandexGPT клиент инициализирован")
         except Exception as e:
-            logger.error(f"Ошибка инициализации YandexGPT клиента: {e}")
+            logger.error("Ошибка инициализации YandexGPT клиента: %s", e)
             self.gpt_client = None
 
+        # Ответы на inline кнопки статичны, поэтому сериализуем их один раз
+        self._callback_json = {
+            "settings": AgentResponse.create_info(
+                message="🔧 Выберите категорию настроек или опишите вашу проблему",
+                data={"categories": ["Системные настройки", "Сетевые параметры", "Безопасность", "Производительность"]},
+                actions=["Просто напишите, что нужно настроить!"]
+            ).to_json(),
+            "troubleshooting": AgentResponse.create_info(
+                message="🐛 Опишите проблему, с которой столкнулись",
+                data={"problem_types": ["Ошибки при запуске", "Проблемы с сетью", "Медленная работа", "Неполадки с оборудованием"]},
+                actions=["Чем подробнее опишете, тем точнее будет решение!"]
+            ).to_json(),
+            "general": AgentResponse.create_info(
+                message="ℹ️ Задайте любой вопрос по IT или настройке систем",
+                data={"question_types": ["Как что-то работает", "Рекомендации по выбору", "Объяснение терминов", "Лучшие практики"]},
+                actions=["Я постараюсь дать развернутый ответ!"]
+            ).to_json()
+        }
+
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
         welcome_message = """
@@ -78,13 +103,9 @@ class SettingsTelegramBot:
         await update.message.reply_text("🔄 Тестирую соединение с YandexGPT...")
 
         if self.gpt_client is None:
-            response = AgentResponse.create_error(
-                message="❌ YandexGPT клиент недоступен",
-                error_details="Клиент не был инициализирован",
-                suggestions=["Проверьте настройки API", "Перезапустите бота"]
-            )
+            response = _CLIENT_UNAVAILABLE
         else:
-            response = self.gpt_client.test_connection()
+            response = await self.gpt_client.test_connection_async()
 
         await update.message.reply_text(response.to_json())
 
@@ -92,23 +113,28 @@ class SettingsTelegramBot:
         """Обработчик текстовых сообщений"""
         user_message = update.message.text
 
-        await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
+        # Индикатор набора отправляем параллельно с запросом к YandexGPT
+        action_task = asyncio.create_task(
+            context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
+        )
 
         try:
             if self.gpt_client is None:
-                response = AgentResponse.create_error(
-                    message="❌ YandexGPT клиент недоступен",
-                    error_details="Клиент не был инициализирован",
-                    suggestions=["Проверьте настройки API", "Перезапустите бота"]
-                )
+                response = _CLIENT_UNAVAILABLE
             else:
-                response = self.gpt_client.generate_response(user_message)
+                response = await self.gpt_client.generate_response_async(user_message)
+
+            # Индикатор набора не обязателен: его ошибка не должна отменять готовый ответ
+            try:
+                await action_task
+            except Exception as e:
+                logger.warning("Failed to send typing action: %s", e)
 
             await update.message.reply_text(response.to_json())
-            logger.info(f"Response type: {response.type}, Confidence: {response.confidence}")
+            logger.info("Response type: %s, Confidence: %s", response.type, response.confidence)
 
         except Exception as e:
-            logger.error(f"Error processing message: {str(e)}")
+            logger.error("Error processing message: %s", e)
             response = AgentResponse.create_error(
                 message="❌ Ошибка при обработке сообщения",
                 error_details=str(e)[:200],
@@ -116,38 +142,32 @@ class SettingsTelegramBot:
             )
             await update.message.reply_text(response.to_json())
 
+        finally:
+            if not action_task.done():
+                action_task.cancel()
+
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик callback запросов от inline кнопок"""
         query = update.callback_query
         await query.answer()
 
-        if query.data == "settings":
-            response = AgentResponse.create_info(
-                message="🔧 Выберите категорию настроек или опишите вашу проблему",
-                data={"categories": ["Системные настройки", "Сетевые параметры", "Безопасность", "Производительность"]},
-                actions=["Просто напишите, что нужно настроить!"]
-            )
-            await query.edit_message_text(response.to_json())
-
-        elif query.data == "troubleshooting":
-            response = AgentResponse.create_info(
-                message="🐛 Опишите проблему, с которой столкнулись",
-                data={"problem_types": ["Ошибки при запуске", "Проблемы с сетью", "Медленная работа", "Неполадки с оборудованием"]},
-                actions=["Чем подробнее опишете, тем точнее будет решение!"]
-            )
-            await query.edit_message_text(response.to_json())
+        text = self._callback_json.get(query.data)
+        if text:
+            await query.edit_message_text(text)
 
-        elif query.data == "general":
-            response = AgentResponse.create_info(
-                message="ℹ️ Задайте любой вопрос по IT или настройке систем",
-                data={"question_types": ["Как что-то работает", "Рекомендации по выбору", "Объяснение терминов", "Лучшие практики"]},
-                actions=["Я постараюсь дать развернутый ответ!"]
-            )
-            await query.edit_message_text(response.to_json())
+    async def post_shutdown(self, application: Application):
+        """Закрывает соединения с YandexGPT при остановке бота"""
+        if self.gpt_client is not None:
+            await self.gpt_client.aclose()
 
     def run(self):
         """Запускает бота"""
-        application = Application.builder().token(Config.TELEGRAM_BOT_TOKEN).build()
+        application = (
+            Application.builder()
+            .token(Config.TELEGRAM_BOT_TOKEN)
+            .post_shutdown(self.post_shutdown)
+            .build()
+        )
 
         application.add_handler(CommandHandler("start", self.start_command))
         application.add_handler(CommandHandler("help", self.help_command))
@@ -155,5 +175,14 @@ class SettingsTelegramBot:
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
         application.add_handler(CallbackQueryHandler(self.handle_callback))
 
-        logger.info("Starting Settings AI Telegram Bot...")
-        application.run_polling()
\ No newline at end of file
+        if Config.WEBHOOK_URL:
+            logger.info("Starting Settings AI Telegram Bot (webhook)...")
+            application.run_webhook(
+                listen="0.0.0.0",
+                port=Config.WEBHOOK_PORT,
+                url_path=Config.TELEGRAM_BOT_TOKEN,
+                webhook_url=f"{Config.WEBHOOK_URL.rstrip('/')}/{Config.TELEGRAM_BOT_TOKEN}"
+            )
+        else:
+            logger.info("Starting Settings AI Telegram Bot (polling)...")
+            application.run_polling()
\ No newline at end of file
@@ -2,225 +2,320 @@
 Клиент для работы с YandexGPT API
 """
 
+import httpx
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
 import re
 import logging
 from typing import Dict, Any, Optional
 from config import Config
-from models import AgentResponse, ResponseType
+from models import AgentResponse, AGENT_RESPONSE_ADAPTER, ResponseType
 
 logger = logging.getLogger(__name__)
 
+# Шаблоны поиска JSON внутри блоков кода ``` (от более точного к более общему)
+_FENCED_JSON_PATTERNS = [
+    re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL),
+    re.compile(r'```\s*(\{.*?\})\s*```', re.DOTALL),
+]
 
-class YandexGPTClient:
-    """Клиент для работы с YandexGPT API"""
-
-    def __init__(self):
-        self.api_key = Config.YANDEX_API_KEY
-        self.folder_id = Config.YANDEX_FOLDER_ID
-        self.base_url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
-
-    def _get_headers(self) -> Dict[str, str]:
-        """Возвращает заголовки для запроса к API"""
-        return {
-            "Authorization": f"Api-Key {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
-    def _create_prompt(self, user_message: str) -> str:
-        """Создает промпт с инструкциями по JSON формату"""
-        return f"""Ты - умный помощник, работающий на базе YandexGPT. Ты можешь отвечать на любые вопросы, но особенно хорошо разбираешься в настройке систем и решении технических проблем.
+# Статичная часть промпта: инструкции и примеры JSON ответа
+_PROMPT_PREFIX = """Ты - умный помощник, работающий на базе YandexGPT. Ты можешь отвечать на любые вопросы, но особенно хорошо разбираешься в настройке систем и решении технических проблем.
 
 ВАЖНО: Отвечай ТОЛЬКО в JSON формате, без дополнительного текста.
 
 Формат ответа:
-{{
+{
     "type": "success|error|info|warning",
     "message": "Основное сообщение",
-    "data": {{
+    "data": {
         "category": "категория_проблемы",
         "solution": "Краткое описание решения",
         "steps": ["шаг1", "шаг2"],
         "additional_info": "Дополнительная информация"
-    }},
+    },
     "actions": ["действие1", "действие2"],
     "confidence": 0.95,
     "timestamp": "2025-10-02T23:00:00.000000",
     "suggestions": null,
     "error_details": null
-}}
+}
 
 Примеры:
 
 Технический вопрос:
-{{
+{
     "type": "success",
     "message": "Проблема с сетью решена",
-    "data": {{
+    "data": {
         "category": "network",
         "solution": "Решение найдено",
         "steps": ["Шаг 1", "Шаг 2"],
         "additional_info": "Дополнительная информация"
-    }},
+    },
     "actions": ["Действие 1", "Действие 2"],
     "confidence": 0.98,
     "timestamp": "2025-10-02T23:00:00.000000",
     "suggestions": null,
     "error_details": null
-}}
+}
 
 Общий вопрос:
-{{
+{
     "type": "info",
     "message": "Привет! Всё хорошо, спасибо! Как дела у тебя?",
-    "data": {{
+    "data": {
         "category": "greeting",
         "solution": "Я готов помочь с любыми вопросами",
         "steps": [],
         "additional_info": "Могу помочь с техническими проблемами или просто поболтать"
-    }},
+    },
     "actions": ["Задайте вопрос", "Опишите проблему"],
     "confidence": 1.0,
     "timestamp": "2025-10-02T23:00:00.000000",
     "suggestions": null,
     "error_details": null
-}}
+}
 
-ЗАПРОС: {user_message}
+ЗАПРОС: """
+_PROMPT_SUFFIX = "\n\nОТВЕТ:"
 
-ОТВЕТ:"""
+
+# Ответ, когда в выводе модели не удалось найти корректный JSON
+_FALLBACK_INFO = AgentResponse.create_info(
+    message="Запрос не содержит информации для решения проблемы",
+    data={
+        "category": "unknown",
+        "solution": "Необходимо предоставить более детальное описание проблемы",
+        "steps": [
+            "Предоставьте подробное описание проблемы",
+            "Укажите симптомы и контекст"
+        ],
+        "additional_info": "Для корректной помощи требуется более конкретная информация о системе и возникшей проблеме"
+    },
+    actions=["Уточните запрос", "Опишите проблему подробно"],
+    confidence=0.95
+)
+
+
+# Сообщение для проверки соединения с API
+_TEST_MESSAGE = "Привет! Это тест соединения."
+
+
+class YandexGPTClient:
+    """Клиент для работы с YandexGPT API"""
+
+    def __init__(self):
+        self.api_key = Config.YANDEX_API_KEY
+        self.folder_id = Config.YANDEX_FOLDER_ID
+        self.base_url = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+        # Ключ API не меняется, поэтому заголовки собираем один раз
+        self._headers = {
+            "Authorization": f"Api-Key {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+        # Общая сессия держит keep-alive соединения с API между запросами.
+        # Повторяем только ответы из status_forcelist: read=0 не дает повторно
+        # отправить платный запрос на генерацию после таймаута чтения
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=2,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["POST"],
+                raise_on_status=False
+            )
+        )
+        self._session.mount("https://", adapter)
+
+        # Асинхронный клиент для вызовов из обработчиков бота с тем же пулом соединений.
+        # Транспорт httpx повторяет только неудачные подключения, запрос к модели
+        # повторно не отправляется
+        self._aclient = httpx.AsyncClient(
+            timeout=30,
+            headers=self._headers,
+            transport=httpx.AsyncHTTPTransport(
+                retries=2,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4)
+            )
+        )
+
+    def _get_headers(self) -> Dict[str, str]:
+        """Возвращает заголовки для запроса к API"""
+        return self._headers
+
+    def _create_prompt(self, user_message: str) -> str:
+        """Создает промпт с инструкциями по JSON формату"""
+        return _PROMPT_PREFIX + user_message + _PROMPT_SUFFIX
 
     def _extract_json_from_text(self, text: str) -> Optional[Dict[str, Any]]:
         """Извлекает JSON из текста"""
-        json_patterns = [
-            r'```json\s*(\{.*?\})\s*```',
-            r'```\s*(\{.*?\})\s*```',
-            r'\{.*\}',
-        ]
-
-        for pattern in json_patterns:
-            matches = re.findall(pattern, text, re.DOTALL)
-            for match in matches:
-                try:
-                    cleaned_match = match.strip()
-                    return json.loads(cleaned_match)
-                except json.JSONDecodeError:
-                    continue
+        # Блоки кода ищем регулярками, только если они вообще есть в тексте
+        if '```' in text:
+            for pattern in _FENCED_JSON_PATTERNS:
+                # finditer не собирает все совпадения заранее: выходим на первом валидном JSON
+                for match in pattern.finditer(text):
+                    try:
+                        return orjson.loads(match.group(1))
+                    except orjson.JSONDecodeError:
+                        continue
+
+        # Иначе берем всё от первой "{" до последней "}"
+        start = text.find('{')
+        end = text.rfind('}')
+        if start != -1 and end > start:
+            try:
+                return orjson.loads(text[start:end + 1])
+            except orjson.JSONDecodeError:
+                pass
         return None
 
+    def _build_payload(self, user_message: str) -> Dict[str, Any]:
+        """Формирует тело запроса к API"""
+        prompt = self._create_prompt(user_message)
+
+        return {
+            "modelUri": f"gpt://{self.folder_id}/yandexgpt",
+            "completionOptions": {
+                "stream": False,
+                "temperature": 0.3,
+                "maxTokens": 2000
+            },
+            "messages": [
+                {
+                    "role": "user",
+                    "text": prompt
+                }
+            ]
+        }
+
+    def _parse_api_response(self, response) -> AgentResponse:
+        """Разбирает HTTP ответ API (requests или httpx) в AgentResponse"""
+        if response.status_code != 200:
+            return AgentResponse.create_error(
+                message="❌ Ошибка API YandexGPT",
+                error_details=f"HTTP {response.status_code}: {response.text[:200]}",
+                suggestions=["Проверьте подключение к интернету", "Попробуйте позже"]
+            )
+
+        result = orjson.loads(response.content)
+        ai_response = result.get("result", {}).get("alternatives", [{}])[0].get("message", {}).get("text", "")
+
+        # Парсим JSON ответ от AI
+        try:
+            parsed_data = orjson.loads(ai_response)
+            return AGENT_RESPONSE_ADAPTER.validate_python(parsed_data)
+        except orjson.JSONDecodeError:
+            extracted_json = self._extract_json_from_text(ai_response)
+            if extracted_json:
+                try:
+                    return AGENT_RESPONSE_ADAPTER.validate_python(extracted_json)
+                except Exception:
+                    return _FALLBACK_INFO
+            else:
+                return _FALLBACK_INFO
+
+    def _timeout_error(self) -> AgentResponse:
+        """Ответ при превышении времени ожидания"""
+        return AgentResponse.create_error(
+            message="⏰ Превышено время ожидания ответа от YandexGPT",
+            error_details="Timeout при запросе к API",
+            suggestions=["Попробуйте еще раз", "Проверьте подключение к интернету"]
+        )
+
+    def _connection_error(self, e: Exception) -> AgentResponse:
+        """Ответ при ошибке соединения"""
+        return AgentResponse.create_error(
+            message="❌ Ошибка соединения с YandexGPT",
+            error_details=str(e)[:200],
+            suggestions=["Проверьте подключение к интернету", "Попробуйте позже"]
+        )
+
+    def _unexpected_error(self, e: Exception) -> AgentResponse:
+        """Ответ при неожиданной ошибке"""
+        return AgentResponse.create_error(
+            message="❌ Неожиданная ошибка при работе с YandexGPT",
+            error_details=str(e)[:200],
+            suggestions=["Попробуйте перезапустить бота", "Обратитесь к администратору"]
+        )
+
     def generate_response(self, user_message: str) -> AgentResponse:
         """Генерирует ответ от YandexGPT"""
         try:
-            prompt = self._create_prompt(user_message)
-
-            payload = {
-                "modelUri": f"gpt://{self.folder_id}/yandexgpt",
-                "completionOptions": {
-                    "stream": False,
-                    "temperature": 0.3,
-                    "maxTokens": 2000
-                },
-                "messages": [
-                    {
-                        "role": "user",
-                        "text": prompt
-                    }
-                ]
-            }
-
-            response = requests.post(
+            response = self._session.post(
                 self.base_url,
-                headers=self._get_headers(),
-                json=payload,
+                json=self._build_payload(user_message),
                 timeout=30
             )
+            return self._parse_api_response(response)
 
-            if response.status_code != 200:
-                return AgentResponse.create_error(
-                    message="❌ Ошибка API YandexGPT",
-                    error_details=f"HTTP {response.status_code}: {response.text[:200]}",
-                    suggestions=["Проверьте подключение к интернету", "Попробуйте позже"]
-                )
+        except requests.exceptions.Timeout:
+            return self._timeout_error()
 
-            result = response.json()
-            ai_response = result.get("result", {}).get("alternatives", [{}])[0].get("message", {}).get("text", "")
+        except requests.exceptions.ConnectionError as e:
+            return self._connection_error(e)
 
-            # Парсим JSON ответ от AI
-            try:
-                parsed_data = json.loads(ai_response.strip())
-                return AgentResponse(**parsed_data)
-            except json.JSONDecodeError:
-                extracted_json = self._extract_json_from_text(ai_response)
-                if extracted_json:
-                    try:
-                        return AgentResponse(**extracted_json)
-                    except Exception as e:
-                        return AgentResponse.create_info(
-                            message="Запрос не содержит информации для решения проблемы",
-                            data={
-                                "category": "unknown",
-                                "solution": "Необходимо предоставить более детальное описание проблемы",
-                                "steps": [
-                                    "Предоставьте подробное описание проблемы",
-                                    "Укажите симптомы и контекст"
-                                ],
-                                "additional_info": "Для корректной помощи требуется более конкретная информация о системе и возникшей проблеме"
-                            },
-                            actions=["Уточните запрос", "Опишите проблему подробно"],
-                            confidence=0.95
-                        )
-                else:
-                    return AgentResponse.create_info(
-                        message="Запрос не содержит информации для решения проблемы",
-                        data={
-                            "category": "unknown",
-                            "solution": "Необходимо предоставить более детальное описание проблемы",
-                            "steps": [
-                                "Предоставьте подробное описание проблемы",
-                                "Укажите симптомы и контекст"
-                            ],
-                            "additional_info": "Для корректной помощи требуется более конкретная информация о системе и возникшей проблеме"
-                        },
-                        actions=["Уточните запрос", "Опишите проблему подробно"],
-                        confidence=0.95
-                    )
+        except Exception as e:
+            return self._unexpected_error(e)
 
-        except requests.exceptions.Timeout:
-            return AgentResponse.create_error(
-                message="⏰ Превышено время ожидания ответа от YandexGPT",
-                error_details="Timeout при запросе к API",
-                suggestions=["Попробуйте еще раз", "Проверьте подключение к интернету"]
+    async def generate_response_async(self, user_message: str) -> AgentResponse:
+        """Генерирует ответ от YandexGPT, не блокируя event loop"""
+        try:
+            response = await self._aclient.post(
+                self.base_url,
+                json=self._build_payload(user_message)
             )
+            return self._parse_api_response(response)
 
-        except requests.exceptions.ConnectionError as e:
-            return AgentResponse.create_error(
-                message="❌ Ошибка соединения с YandexGPT",
-                error_details=str(e)[:200],
-                suggestions=["Проверьте подключение к интернету", "Попробуйте позже"]
-            )
+        except httpx.TimeoutException:
+            return self._timeout_error()
+
+        except httpx.TransportError as e:
+            return self._connection_error(e)
 
         except Exception as e:
-            return AgentResponse.create_error(
-                message="❌ Неожиданная ошибка при работе с YandexGPT",
-                error_details=str(e)[:200],
-                suggestions=["Попробуйте перезапустить бота", "Обратитесь к администратору"]
-            )
+            return self._unexpected_error(e)
+
+    async def aclose(self):
+        """Закрывает HTTP клиенты"""
+        await self._aclient.aclose()
+        self._session.close()
+
+    def _check_test_response(self, test_response: AgentResponse) -> AgentResponse:
+        """Преобразует ответ на тестовый запрос в результат проверки соединения"""
+        if test_response.type == ResponseType.ERROR:
+            return test_response
+        return AgentResponse.create_success(
+            message="✅ Соединение с YandexGPT работает!",
+            confidence=1.0
+        )
+
+    def _test_error(self, e: Exception) -> AgentResponse:
+        """Ответ при ошибке тестирования соединения"""
+        return AgentResponse.create_error(
+            message="❌ Ошибка при тестировании соединения с YandexGPT",
+            error_details=str(e)[:200],
+            suggestions=["Проверьте настройки API", "Проверьте подключение к интернету"]
+        )
 
     def test_connection(self) -> AgentResponse:
         """Тестирует соединение с YandexGPT API"""
         try:
-            test_response = self.generate_response("Привет! Это тест соединения.")
-            if test_response.type == ResponseType.ERROR:
-                return test_response
-            else:
-                return AgentResponse.create_success(
-                    message="✅ Соединение с YandexGPT работает!",
-                    confidence=1.0
-                )
+            return self._check_test_response(self.generate_response(_TEST_MESSAGE))
         except Exception as e:
-            return AgentResponse.create_error(
-                message="❌ Ошибка при тестировании соединения с YandexGPT",
-                error_details=str(e)[:200],
-                suggestions=["Проверьте настройки API", "Проверьте подключение к интернету"]
-            )
\ No newline at end of file
+            return self._test_error(e)
+
+    async def test_connection_async(self) -> AgentResponse:
+        """Тестирует соединение с YandexGPT API, не блокируя event loop"""
+        try:
+            return self._check_test_response(await self.generate_response_async(_TEST_MESSAGE))
+        except Exception as e:
+            return self._test_error(e)
\ No newline at end of file